@@ -0,0 +1,28 @@
+"""
+Application Settings
+
+Environment configuration, read once at import from the process environment
+and the .env file. Import `settings` instead of calling os.getenv per request.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    # Resolve .env next to this file, not the CWD, so uvicorn/celery work from any directory
+    model_config = SettingsConfigDict(env_file=Path(__file__).with_name(".env"), extra="ignore")
+
+    database_url: str = ""
+    database_name: str = ""
+    broker_url: str = ""
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+
+settings = get_settings()
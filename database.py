@@ -5,45 +5,117 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+import asyncio
+import logging
+from motor.motor_asyncio import AsyncIOMotorClient
+from bson import ObjectId
+from bson.codec_options import CodecOptions, TypeDecoder, TypeRegistry
 from datetime import datetime, timezone
-import os
-from dotenv import load_dotenv
 from typing import Union
 from pydantic import BaseModel
 
-# Load environment variables from .env file
-load_dotenv()
+from config import settings
+
+logger = logging.getLogger(__name__)
 
 _client = None
 db = None
 
-database_url = os.getenv("DATABASE_URL")
-database_name = os.getenv("DATABASE_NAME")
+database_url = settings.database_url
+database_name = settings.database_name
+
+
+class ObjectIdStrCodec(TypeDecoder):
+    """Decode ObjectIds straight to their hex string"""
+    bson_type = ObjectId
+
+    def transform_bson(self, value):
+        return str(value)
+
+
+class DatetimeIsoCodec(TypeDecoder):
+    """Decode BSON datetimes straight to ISO-8601 strings"""
+    bson_type = datetime
+
+    def transform_bson(self, value):
+        return value.isoformat()
+
+
+# Documents come back JSON-ready, so handlers can return them without a per-field walk
+codec_options = CodecOptions(
+    tz_aware=True,
+    tzinfo=timezone.utc,
+    type_registry=TypeRegistry([ObjectIdStrCodec(), DatetimeIsoCodec()]),
+)
 
-if database_url and database_name:
-    _client = MongoClient(database_url)
-    db = _client[database_name]
+
+def connect_db():
+    """Create the Motor client; call from the app lifespan so the pool binds to the running loop"""
+    global _client, db
+    if database_url and database_name:
+        _client = AsyncIOMotorClient(
+            database_url, maxPoolSize=50, minPoolSize=10, serverSelectionTimeoutMS=3000
+        )
+        db = _client.get_database(database_name, codec_options=codec_options)
+
+
+def close_db():
+    """Close the Motor client and release pooled connections"""
+    global _client, db
+    if _client is not None:
+        _client.close()
+    _client = None
+    db = None
+
+async def warm_up_db():
+    """Ping once at startup so server selection and the TLS handshake aren't paid by the first request"""
+    if db is None:
+        return
+    # Best effort: an unreachable DB must not stop the app from serving (/test and /readyz report it)
+    try:
+        await db.command("ping")
+    except Exception:
+        logger.exception("Database warm-up ping failed")
+
+
+async def ensure_indexes():
+    """Create the indexes backing every list/leaderboard filter so none of them collection-scan"""
+    if db is None:
+        return
+    try:
+        await asyncio.gather(
+            db["team"].create_index([("game", 1), ("country", 1), ("stats.points", -1), ("stats.wins", -1)]),
+            db["team"].create_index([("country", 1), ("game", 1)]),
+            db["venue"].create_index("country"),
+            db["challenge"].create_index([("challenger_team_id", 1), ("opponent_team_id", 1)]),
+            db["challenge"].create_index([("opponent_team_id", 1)]),
+            db["booking"].create_index("challenge_id"),
+        )
+    except Exception:
+        logger.exception("Creating indexes failed; they will be retried on next startup")
 
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
-    """Insert a single document with timestamp"""
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
+    """Insert a single document with timestamp, returning (inserted_id, document)"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
 
     # Convert Pydantic model to dict if needed
     if isinstance(data, BaseModel):
-        data_dict = data.model_dump()
+        data_dict = data.model_dump(by_alias=True, exclude_none=True)
     else:
         data_dict = data.copy()
 
-    data_dict['created_at'] = datetime.now(timezone.utc)
-    data_dict['updated_at'] = datetime.now(timezone.utc)
+    # BSON datetimes have millisecond precision; truncate so the returned document matches what a read gives back
+    now = datetime.now(timezone.utc)
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    data_dict['created_at'] = now
+    data_dict['updated_at'] = now
 
-    result = db[collection_name].insert_one(data_dict)
-    return str(result.inserted_id)
+    result = await db[collection_name].insert_one(data_dict)
+    return result.inserted_id, data_dict
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
     """Get documents from collection"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
@@ -52,4 +124,4 @@ def get_documents(collection_name: str, filter_dict: dict = None, limit: int = N
     if limit:
         cursor = cursor.limit(limit)
     
-    return list(cursor)
+    return await cursor.to_list(length=None)
@@ -1,16 +1,61 @@
-import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Optional
 
-from fastapi import FastAPI, HTTPException, Query
+import orjson
+from cachetools import TTLCache
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse
+from kombu.exceptions import OperationalError as BrokerError
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
+from pydantic_core import core_schema
 from bson import ObjectId
+from pymongo import ReturnDocument
 
-from database import db, create_document, get_documents
-from schemas import GamerUser, Team, Venue, Challenge, Booking, Match
+import database
+from config import settings
+from database import connect_db, close_db, warm_up_db, ensure_indexes, create_document, get_documents
+from schemas import DEFAULT_APPROVALS, GamerUser, Team, Venue, Challenge, Booking, Match, MatchFormat, TeamRole
+from tasks import broker_url, propagate_stats, stats_updates
 
-app = FastAPI(title="Gaming Platform API")
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    connect_db()
+    await warm_up_db()
+    await ensure_indexes()
+    yield
+    close_db()
+
+
+def _orjson_default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError
+
+
+class MongoJSONResponse(ORJSONResponse):
+    """orjson response that also encodes ObjectIds and treats naive datetimes as UTC
+
+    Handlers returning Mongo documents return this directly: FastAPI only runs
+    jsonable_encoder over plain return values, so this skips that extra walk.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+
+app = FastAPI(title="Gaming Platform API", lifespan=lifespan, default_response_class=MongoJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,32 +69,68 @@ app.add_middleware(
 # Helpers
 # -----------------------------
 
-def oid(id_str: str) -> ObjectId:
-    try:
-        return ObjectId(id_str)
-    except Exception:
+class PyObjectId(ObjectId):
+    """Path/body type that arrives as an already-parsed ObjectId (400 on malformed ids)"""
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, _source: Any, _handler: Any) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            cls._validate, serialization=core_schema.to_string_ser_schema()
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, _schema: Any, handler: Any) -> Dict[str, Any]:
+        return handler(core_schema.str_schema())
+
+    @staticmethod
+    def _validate(value: Any) -> ObjectId:
+        if isinstance(value, ObjectId):
+            return value
+        if ObjectId.is_valid(value):
+            return ObjectId(value)
         raise HTTPException(status_code=400, detail="Invalid id format")
 
 
-def serialize(doc: Dict[str, Any]) -> Dict[str, Any]:
-    if not doc:
-        return doc
-    result: Dict[str, Any] = {}
-    for k, v in doc.items():
-        if isinstance(v, ObjectId):
-            result[k] = str(v)
-        elif isinstance(v, datetime):
-            result[k] = v.isoformat()
-        else:
-            result[k] = v
-    if "_id" in doc:
-        result["id"] = str(doc["_id"])
-        result.pop("_id", None)
-    return result
+def with_id(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Rename Mongo's _id to id in place; everything else is left to the response encoder"""
+    if doc and "_id" in doc:
+        doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+def _inline_defs(schema: Dict[str, Any]) -> Dict[str, Any]:
+    defs = schema.pop("$defs", {})
+
+    def resolve(node: Any) -> Any:
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return resolve(defs[node["$ref"].rsplit("/", 1)[-1]])
+            return {k: resolve(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [resolve(v) for v in node]
+        return node
+
+    return resolve(schema)
+
 
+def adapter_body(adapter: TypeAdapter) -> Any:
+    """Dependency validating the raw JSON body with a precompiled TypeAdapter"""
 
-def serialize_list(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    return [serialize(d) for d in docs]
+    async def parse(request: Request) -> Any:
+        try:
+            return adapter.validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+            )
+
+    return Depends(parse)
+
+
+def adapter_body_docs(adapter: TypeAdapter) -> Dict[str, Any]:
+    """openapi_extra documenting a body parsed by adapter_body"""
+    schema = _inline_defs(adapter.json_schema())
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
 
 
 # -----------------------------
@@ -57,26 +138,53 @@ def serialize_list(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
 # -----------------------------
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Gaming Platform API running"}
 
 
+# Probes can hit these at several Hz, so DB checks are cached rather than run per request
+_ping_cache: TTLCache = TTLCache(maxsize=1, ttl=5)
+_collections_cache: TTLCache = TTLCache(maxsize=1, ttl=60)
+
+
+async def _database_ready() -> bool:
+    """Ping the database at most once per _ping_cache TTL"""
+    ready = _ping_cache.get("ping")
+    if ready is None:
+        try:
+            await database.db.command("ping")
+            ready = True
+        except Exception:
+            ready = False
+        _ping_cache["ping"] = ready
+    return ready
+
+
+_TEST_RESPONSE_TEMPLATE = MappingProxyType({
+    "backend": "✅ Running",
+    "database": "❌ Not Available",
+    "database_url": "❌ Not Set",
+    "database_name": "❌ Not Set",
+    "connection_status": "Not Connected",
+    "collections": (),
+})
+
+
 @app.get("/test")
-def test_database():
-    response = {
-        "backend": "✅ Running",
-        "database": "❌ Not Available",
-        "database_url": "❌ Not Set",
-        "database_name": "❌ Not Set",
-        "connection_status": "Not Connected",
-        "collections": [],
-    }
+async def test_database():
+    response = dict(_TEST_RESPONSE_TEMPLATE)
     try:
-        if db is not None:
+        if database.db is not None:
             response["database"] = "✅ Available"
-            response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
-            response["database_name"] = "✅ Set" if os.getenv("DATABASE_NAME") else "❌ Not Set"
-            _ = db.list_collection_names()
+            response["database_url"] = "✅ Set" if settings.database_url else "❌ Not Set"
+            response["database_name"] = "✅ Set" if settings.database_name else "❌ Not Set"
+            # Connectivity comes from the short-TTL ping; only the collection names are cached longer
+            if not await _database_ready():
+                response["database"] = "❌ Error: Database not reachable"
+                return response
+            _ = _collections_cache.get("names")
+            if _ is None:
+                _ = _collections_cache["names"] = await database.db.list_collection_names()
             response["database"] = "✅ Connected & Working"
             response["connection_status"] = "Connected"
             response["collections"] = _
@@ -85,80 +193,78 @@ def test_database():
     return response
 
 
+@app.get("/livez")
+async def livez():
+    # Liveness only says the process is serving; it never touches the database
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    if not await _database_ready():
+        raise HTTPException(status_code=503, detail="Database not reachable")
+    return {"status": "ok"}
+
+
 # -----------------------------
 # Users
 # -----------------------------
 
-class CreateUserRequest(GamerUser):
-    pass
-
-
 @app.post("/users")
-def create_user(payload: CreateUserRequest):
-    user_id = create_document("gameruser", payload)
-    doc = db["gameruser"].find_one({"_id": oid(user_id)})
-    return serialize(doc)
+async def create_user(payload: GamerUser):
+    _, doc = await create_document("gameruser", payload)
+    return MongoJSONResponse(with_id(doc))
 
 
 # -----------------------------
 # Venues
 # -----------------------------
 
-class CreateVenueRequest(Venue):
-    pass
-
-
 @app.post("/venues")
-def create_venue(payload: CreateVenueRequest):
-    venue_id = create_document("venue", payload)
-    doc = db["venue"].find_one({"_id": oid(venue_id)})
-    return serialize(doc)
+async def create_venue(payload: Venue):
+    _, doc = await create_document("venue", payload)
+    return MongoJSONResponse(with_id(doc))
 
 
 @app.get("/venues")
-def list_venues(country: Optional[str] = None):
+async def list_venues(country: Optional[str] = None):
     filt: Dict[str, Any] = {}
     if country:
         filt["country"] = country
-    docs = get_documents("venue", filt)
-    return serialize_list(docs)
+    docs = await get_documents("venue", filt)
+    return MongoJSONResponse([with_id(d) for d in docs])
 
 
 # -----------------------------
 # Teams
 # -----------------------------
 
-class CreateTeamRequest(Team):
-    pass
-
-
 @app.post("/teams")
-def create_team(payload: CreateTeamRequest):
+async def create_team(payload: Team):
     # Ensure members include captain
     if payload.captain_user_id and payload.captain_user_id not in payload.member_user_ids:
         payload.member_user_ids.append(payload.captain_user_id)
-    team_id = create_document("team", payload)
-    doc = db["team"].find_one({"_id": oid(team_id)})
-    return serialize(doc)
+    _, doc = await create_document("team", payload)
+    return MongoJSONResponse(with_id(doc))
 
 
 @app.get("/teams")
-def list_teams(country: Optional[str] = None, game: Optional[str] = None):
+async def list_teams(country: Optional[str] = None, game: Optional[str] = None):
     filt: Dict[str, Any] = {}
     if country:
         filt["country"] = country
     if game:
         filt["game"] = game
-    teams = get_documents("team", filt)
-    return serialize_list(teams)
+    teams = await get_documents("team", filt)
+    return MongoJSONResponse([with_id(t) for t in teams])
 
 
 @app.get("/teams/{team_id}/stats")
-def get_team_stats(team_id: str):
-    team = db["team"].find_one({"_id": oid(team_id)})
+async def get_team_stats(team_id: PyObjectId):
+    team = await database.db["team"].find_one({"_id": team_id})
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
-    return serialize(team.get("stats", {}))
+    return MongoJSONResponse(team.get("stats", {}))
 
 
 # -----------------------------
@@ -166,57 +272,59 @@ def get_team_stats(team_id: str):
 # -----------------------------
 
 class ProposeChallengeRequest(BaseModel):
-    challenger_team_id: str
-    opponent_team_id: str
+    model_config = ConfigDict(use_enum_values=True, validate_default=True)
+
+    challenger_team_id: PyObjectId
+    opponent_team_id: PyObjectId
     game: str
     country: str
     proposed_datetime: Optional[datetime] = None
-    format: str = Field("BO3", pattern="^(BO1|BO2|BO3|BO5)$")
+    format: MatchFormat = MatchFormat.BO3
     venue_id: Optional[str] = None
     notes: Optional[str] = None
 
 
 @app.post("/challenges")
-def propose_challenge(payload: ProposeChallengeRequest):
-    # Validate teams exist and constraints
-    t1 = db["team"].find_one({"_id": oid(payload.challenger_team_id)})
-    t2 = db["team"].find_one({"_id": oid(payload.opponent_team_id)})
-    if not t1 or not t2:
+async def propose_challenge(payload: ProposeChallengeRequest):
+    # Validate teams exist and constraints; fetch both in one round-trip with only the compared fields
+    team_ids = {payload.challenger_team_id, payload.opponent_team_id}
+    teams = await database.db["team"].find(
+        {"_id": {"$in": list(team_ids)}}, projection={"_id": 0, "country": 1, "game": 1}
+    ).to_list(length=2)
+    if len(teams) != len(team_ids):
         raise HTTPException(status_code=400, detail="Both teams must exist")
-    if t1["country"] != t2["country"] or t1["country"] != payload.country:
+    if any(t["country"] != payload.country for t in teams):
         raise HTTPException(status_code=400, detail="Teams must be from the same country")
-    if t1["game"] != t2["game"] or t1["game"] != payload.game:
+    if any(t["game"] != payload.game for t in teams):
         raise HTTPException(status_code=400, detail="Both teams must play the same game")
 
     ch = Challenge(
-        challenger_team_id=payload.challenger_team_id,
-        opponent_team_id=payload.opponent_team_id,
+        challenger_team_id=str(payload.challenger_team_id),
+        opponent_team_id=str(payload.opponent_team_id),
         game=payload.game,
         country=payload.country,
         proposed_datetime=payload.proposed_datetime,
         format=payload.format,  # type: ignore
         venue_id=payload.venue_id,
         status="proposed",
-        approvals={"challenger": False, "opponent": False},
+        approvals=dict(DEFAULT_APPROVALS),
         notes=payload.notes,
     )
-    cid = create_document("challenge", ch)
-    doc = db["challenge"].find_one({"_id": oid(cid)})
-    return serialize(doc)
+    _, doc = await create_document("challenge", ch)
+    return MongoJSONResponse(with_id(doc))
 
 
 class NegotiateChallengeRequest(BaseModel):
+    model_config = ConfigDict(use_enum_values=True)
+
     proposed_datetime: Optional[datetime] = None
-    format: Optional[str] = Field(None, pattern="^(BO1|BO2|BO3|BO5)$")
+    format: Optional[MatchFormat] = None
     venue_id: Optional[str] = None
     notes: Optional[str] = None
 
 
 @app.patch("/challenges/{challenge_id}")
-def negotiate_challenge(challenge_id: str, payload: NegotiateChallengeRequest):
-    ch = db["challenge"].find_one({"_id": oid(challenge_id)})
-    if not ch:
-        raise HTTPException(status_code=404, detail="Challenge not found")
+async def negotiate_challenge(challenge_id: PyObjectId, payload: NegotiateChallengeRequest):
     update: Dict[str, Any] = {"status": "negotiating"}
     if payload.proposed_datetime is not None:
         update["proposed_datetime"] = payload.proposed_datetime
@@ -227,27 +335,50 @@ def negotiate_challenge(challenge_id: str, payload: NegotiateChallengeRequest):
     if payload.notes is not None:
         update["notes"] = payload.notes
     # Reset approvals on any change
-    update["approvals"] = {"challenger": False, "opponent": False}
-    db["challenge"].update_one({"_id": oid(challenge_id)}, {"$set": update})
-    doc = db["challenge"].find_one({"_id": oid(challenge_id)})
-    return serialize(doc)
+    update["approvals"] = dict(DEFAULT_APPROVALS)
+    doc = await database.db["challenge"].find_one_and_update(
+        {"_id": challenge_id}, {"$set": update}, return_document=ReturnDocument.AFTER
+    )
+    if not doc:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+    return MongoJSONResponse(with_id(doc))
 
 
 class ApproveRequest(BaseModel):
-    team_role: str = Field(..., pattern="^(challenger|opponent)$")
+    model_config = ConfigDict(use_enum_values=True)
 
+    team_role: TeamRole
 
-@app.post("/challenges/{challenge_id}/approve")
-def approve_challenge(challenge_id: str, payload: ApproveRequest):
-    ch = db["challenge"].find_one({"_id": oid(challenge_id)})
-    if not ch:
+
+_APPROVE_ADAPTER = TypeAdapter(ApproveRequest)
+
+
+@app.post("/challenges/{challenge_id}/approve", openapi_extra=adapter_body_docs(_APPROVE_ADAPTER))
+async def approve_challenge(
+    challenge_id: PyObjectId, payload: ApproveRequest = adapter_body(_APPROVE_ADAPTER)
+):
+    # Flip the role and recompute status server-side in one atomic pipeline update
+    doc = await database.db["challenge"].find_one_and_update(
+        {"_id": challenge_id},
+        [
+            {"$set": {f"approvals.{payload.team_role}": True}},
+            {
+                "$set": {
+                    "status": {
+                        "$cond": [
+                            {"$and": ["$approvals.challenger", "$approvals.opponent"]},
+                            "approved",
+                            {"$ifNull": ["$status", "proposed"]},
+                        ]
+                    }
+                }
+            },
+        ],
+        return_document=ReturnDocument.AFTER,
+    )
+    if not doc:
         raise HTTPException(status_code=404, detail="Challenge not found")
-    approvals = ch.get("approvals", {"challenger": False, "opponent": False})
-    approvals[payload.team_role] = True
-    status = "approved" if approvals.get("challenger") and approvals.get("opponent") else ch.get("status", "proposed")
-    db["challenge"].update_one({"_id": oid(challenge_id)}, {"$set": {"approvals": approvals, "status": status}})
-    doc = db["challenge"].find_one({"_id": oid(challenge_id)})
-    return serialize(doc)
+    return MongoJSONResponse(with_id(doc))
 
 
 # -----------------------------
@@ -260,42 +391,52 @@ class CreateBookingRequest(BaseModel):
     end_datetime: Optional[datetime] = None
 
 
-@app.post("/challenges/{challenge_id}/book")
-def create_booking_for_challenge(challenge_id: str, payload: CreateBookingRequest):
-    ch = db["challenge"].find_one({"_id": oid(challenge_id)})
+_CREATE_BOOKING_ADAPTER = TypeAdapter(CreateBookingRequest)
+
+
+@app.post("/challenges/{challenge_id}/book", openapi_extra=adapter_body_docs(_CREATE_BOOKING_ADAPTER))
+async def create_booking_for_challenge(
+    challenge_id: PyObjectId, payload: CreateBookingRequest = adapter_body(_CREATE_BOOKING_ADAPTER)
+):
+    ch = await database.db["challenge"].find_one({"_id": challenge_id})
     if not ch:
         raise HTTPException(status_code=404, detail="Challenge not found")
     if ch.get("status") not in ["approved", "negotiating", "proposed"]:
         raise HTTPException(status_code=400, detail="Challenge not eligible for booking")
 
     booking = Booking(
-        challenge_id=challenge_id,
+        challenge_id=str(challenge_id),
         venue_id=payload.venue_id,
         start_datetime=payload.start_datetime,
         end_datetime=payload.end_datetime,
         status="pending",
     )
-    bid = create_document("booking", booking)
-    db["challenge"].update_one({"_id": oid(challenge_id)}, {"$set": {"status": "booked", "venue_id": payload.venue_id}})
-    doc = db["booking"].find_one({"_id": oid(bid)})
-    return serialize(doc)
+    _, doc = await create_document("booking", booking)
+    await database.db["challenge"].update_one({"_id": challenge_id}, {"$set": {"status": "booked", "venue_id": payload.venue_id}})
+    return MongoJSONResponse(with_id(doc))
 
 
 class ConfirmBookingRequest(BaseModel):
     confirm: bool = True
 
 
-@app.post("/bookings/{booking_id}/confirm")
-def confirm_booking(booking_id: str, payload: ConfirmBookingRequest):
-    booking = db["booking"].find_one({"_id": oid(booking_id)})
+_CONFIRM_BOOKING_ADAPTER = TypeAdapter(ConfirmBookingRequest)
+
+
+@app.post("/bookings/{booking_id}/confirm", openapi_extra=adapter_body_docs(_CONFIRM_BOOKING_ADAPTER))
+async def confirm_booking(
+    booking_id: PyObjectId, payload: ConfirmBookingRequest = adapter_body(_CONFIRM_BOOKING_ADAPTER)
+):
+    new_status = "confirmed" if payload.confirm else "cancelled"
+    booking = await database.db["booking"].find_one_and_update(
+        {"_id": booking_id}, {"$set": {"status": new_status}}, return_document=ReturnDocument.AFTER
+    )
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
-    new_status = "confirmed" if payload.confirm else "cancelled"
-    db["booking"].update_one({"_id": oid(booking_id)}, {"$set": {"status": new_status}})
     # Keep challenge in booked unless cancelled
     if new_status == "cancelled":
-        db["challenge"].update_one({"_id": oid(booking["challenge_id"])}, {"$set": {"status": "approved"}})
-    return serialize(db["booking"].find_one({"_id": oid(booking_id)}))
+        await database.db["challenge"].update_one({"_id": ObjectId(booking["challenge_id"])}, {"$set": {"status": "approved"}})
+    return MongoJSONResponse(with_id(booking))
 
 
 # -----------------------------
@@ -303,15 +444,16 @@ def confirm_booking(booking_id: str, payload: ConfirmBookingRequest):
 # -----------------------------
 
 class RecordResultRequest(BaseModel):
-    challenge_id: str
+    challenge_id: PyObjectId
     winner_team_id: str
     score_a: int
     score_b: int
 
 
 @app.post("/matches/record")
-def record_match_result(payload: RecordResultRequest):
-    ch = db["challenge"].find_one({"_id": oid(payload.challenge_id)})
+async def record_match_result(payload: RecordResultRequest):
+    cid = payload.challenge_id
+    ch = await database.db["challenge"].find_one({"_id": cid})
     if not ch:
         raise HTTPException(status_code=404, detail="Challenge not found")
     team_a = ch["challenger_team_id"]
@@ -320,7 +462,7 @@ def record_match_result(payload: RecordResultRequest):
         raise HTTPException(status_code=400, detail="Winner must be one of the teams in the challenge")
 
     match = Match(
-        challenge_id=payload.challenge_id,
+        challenge_id=str(cid),
         venue_id=ch.get("venue_id", ""),
         game=ch["game"],
         format=ch.get("format", "BO3"),  # type: ignore
@@ -329,36 +471,35 @@ def record_match_result(payload: RecordResultRequest):
         result={"winner_team_id": payload.winner_team_id, "scores": {"a": payload.score_a, "b": payload.score_b}},
         status="completed",
     )
-    mid = create_document("match", match)
-    db["challenge"].update_one({"_id": oid(payload.challenge_id)}, {"$set": {"status": "completed"}})
-
-    # Update team stats and points (simple Elo-like: win +3, loss 0, draw 1 each)
-    def update_stats(team_id: str, won: bool, draw: bool = False):
-        team = db["team"].find_one({"_id": oid(team_id)})
-        if not team:
-            return
-        stats = team.get("stats", {"matches": 0, "wins": 0, "losses": 0, "draws": 0, "points": 0})
-        stats["matches"] = stats.get("matches", 0) + 1
-        if draw:
-            stats["draws"] = stats.get("draws", 0) + 1
-            stats["points"] = stats.get("points", 0) + 1
-        elif won:
-            stats["wins"] = stats.get("wins", 0) + 1
-            stats["points"] = stats.get("points", 0) + 3
-        else:
-            stats["losses"] = stats.get("losses", 0) + 1
-        db["team"].update_one({"_id": oid(team_id)}, {"$set": {"stats": stats}})
-
-    if payload.score_a == payload.score_b:
-        update_stats(team_a, False, True)
-        update_stats(team_b, False, True)
-    else:
-        winner = payload.winner_team_id
-        loser = team_b if winner == team_a else team_a
-        update_stats(winner, True, False)
-        update_stats(loser, False, False)
 
-    return serialize(db["match"].find_one({"_id": oid(mid)}))
+    draw = payload.score_a == payload.score_b
+    winner = team_a if draw else payload.winner_team_id
+    loser = team_b if winner == team_a else team_a
+
+    # Completing the challenge is the gate: only the request that flips the status records the match,
+    # so concurrent or retried submissions can't insert a second match or count stats twice
+    claimed = await database.db["challenge"].find_one_and_update(
+        {"_id": cid, "status": {"$ne": "completed"}}, {"$set": {"status": "completed"}}
+    )
+    if not claimed:
+        raise HTTPException(status_code=400, detail="Match result already recorded for this challenge")
+
+    if broker_url:
+        # Stats propagation is post-commit work; hand it to the worker once the match is stored
+        _, doc = await create_document("match", match)
+        try:
+            await asyncio.to_thread(propagate_stats.delay, winner, loser, draw)
+        except BrokerError:
+            # The match is already stored; apply the stats inline rather than failing the request
+            logger.exception("Could not enqueue propagate_stats; applying stats inline")
+            await database.db["team"].bulk_write(stats_updates(winner, loser, draw), ordered=False)
+    else:
+        # No worker configured: the match insert and stats updates are independent writes
+        (_, doc), _ = await asyncio.gather(
+            create_document("match", match),
+            database.db["team"].bulk_write(stats_updates(winner, loser, draw), ordered=False),
+        )
+    return MongoJSONResponse(with_id(doc))
 
 
 # -----------------------------
@@ -366,11 +507,11 @@ def record_match_result(payload: RecordResultRequest):
 # -----------------------------
 
 @app.get("/leaderboard")
-def leaderboard(
+async def leaderboard(
     scope: str = Query("global", pattern="^(local|global)$"),
     game: Optional[str] = None,
     country: Optional[str] = None,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=100),
 ):
     filt: Dict[str, Any] = {}
     if game:
@@ -379,15 +520,11 @@ def leaderboard(
         if not country:
             raise HTTPException(status_code=400, detail="Country is required for local leaderboard")
         filt["country"] = country
-    teams = list(db["team"].find(filt))
-    teams.sort(key=lambda t: (t.get("stats", {}).get("points", 0), t.get("stats", {}).get("wins", 0)), reverse=True)
-    return [
-        {
-            "id": str(t["_id"]),
-            "name": t.get("name"),
-            "game": t.get("game"),
-            "country": t.get("country"),
-            "stats": t.get("stats", {}),
-        }
-        for t in teams[:limit]
-    ]
+    cursor = (
+        database.db["team"]
+        .find(filt, projection={"_id": 1, "name": 1, "game": 1, "country": 1, "stats": 1})
+        .sort([("stats.points", -1), ("stats.wins", -1)])
+        .limit(limit)
+    )
+    # The projection already matches the response shape; only _id needs renaming
+    return MongoJSONResponse([{"id": str(t.pop("_id")), **t} async for t in cursor])
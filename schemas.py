@@ -5,9 +5,16 @@ Each Pydantic model corresponds to a MongoDB collection. The collection name
 is the lowercase of the class name (e.g., Team -> "team").
 """
 
-from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
+import orjson
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import List, Optional
 from datetime import datetime
+from enum import Enum
+from types import MappingProxyType
+
+# Read-only default templates; copy with dict() before use
+DEFAULT_STATS = MappingProxyType({"matches": 0, "wins": 0, "losses": 0, "draws": 0, "points": 0})
+DEFAULT_APPROVALS = MappingProxyType({"challenger": False, "opponent": False})
 
 # Core domain models
 
@@ -31,13 +38,7 @@ class Team(BaseModel):
     member_user_ids: List[str] = Field(default_factory=list, description="Team members' user IDs")
     achievements: List[str] = Field(default_factory=list, description="Public achievements")
     stats: dict = Field(
-        default_factory=lambda: {
-            "matches": 0,
-            "wins": 0,
-            "losses": 0,
-            "draws": 0,
-            "points": 0,
-        },
+        default_factory=lambda: dict(DEFAULT_STATS),
         description="Aggregated statistics",
     )
 
@@ -50,39 +51,65 @@ class Venue(BaseModel):
     contact_phone: Optional[str] = None
     admin_user_id: Optional[str] = Field(None, description="User ID of venue admin")
 
-MatchFormat = Literal["BO1", "BO2", "BO3", "BO5"]
+# Closed value sets: validated by enum lookup and stored as their plain string values
+
+class MatchFormat(str, Enum):
+    BO1 = "BO1"
+    BO2 = "BO2"
+    BO3 = "BO3"
+    BO5 = "BO5"
+
+class ChallengeStatus(str, Enum):
+    PROPOSED = "proposed"
+    NEGOTIATING = "negotiating"
+    APPROVED = "approved"
+    BOOKED = "booked"
+    COMPLETED = "completed"
+    REJECTED = "rejected"
+    CANCELLED = "cancelled"
+
+class BookingStatus(str, Enum):
+    PENDING = "pending"
+    CONFIRMED = "confirmed"
+    CANCELLED = "cancelled"
+
+class MatchStatus(str, Enum):
+    SCHEDULED = "scheduled"
+    COMPLETED = "completed"
+
+class TeamRole(str, Enum):
+    CHALLENGER = "challenger"
+    OPPONENT = "opponent"
 
 class Challenge(BaseModel):
+    model_config = ConfigDict(use_enum_values=True, validate_default=True)
+
     challenger_team_id: str
     opponent_team_id: str
     game: str
     country: str = Field(..., description="Match country restriction")
     proposed_datetime: Optional[datetime] = Field(None, description="Proposed start time (UTC)")
-    format: MatchFormat = Field("BO3")
+    format: MatchFormat = Field(MatchFormat.BO3)
     venue_id: Optional[str] = None
-    status: Literal[
-        "proposed",
-        "negotiating",
-        "approved",
-        "booked",
-        "completed",
-        "rejected",
-        "cancelled",
-    ] = "proposed"
+    status: ChallengeStatus = ChallengeStatus.PROPOSED
     approvals: dict = Field(
-        default_factory=lambda: {"challenger": False, "opponent": False},
+        default_factory=lambda: dict(DEFAULT_APPROVALS),
         description="Per-team approvals",
     )
     notes: Optional[str] = None
 
 class Booking(BaseModel):
+    model_config = ConfigDict(use_enum_values=True, validate_default=True)
+
     challenge_id: str
     venue_id: str
     start_datetime: datetime
     end_datetime: Optional[datetime] = None
-    status: Literal["pending", "confirmed", "cancelled"] = "pending"
+    status: BookingStatus = BookingStatus.PENDING
 
 class Match(BaseModel):
+    model_config = ConfigDict(use_enum_values=True, validate_default=True)
+
     challenge_id: str
     venue_id: str
     game: str
@@ -93,4 +120,10 @@ class Match(BaseModel):
         default=None,
         description="Result payload e.g., {winner_team_id, scores: {a: x, b: y}}",
     )
-    status: Literal["scheduled", "completed"] = "scheduled"
+    status: MatchStatus = MatchStatus.SCHEDULED
+
+    @field_validator("result", mode="before")
+    @classmethod
+    def decode_json_result(cls, v):
+        # Store results as subdocuments; a pre-encoded JSON string would otherwise be re-escaped on output
+        return orjson.loads(v) if isinstance(v, (str, bytes)) else v
@@ -15,5 +15,16 @@ mkdir -p logs
 echo "Installing dependencies..."
 pip install -r requirements.txt
 echo "Starting FastAPI server..."
-nohup uvicorn main:app --host 0.0.0.0 --port 8000 --reload > logs/server.log 2>&1 
+if [ "${RELOAD:-0}" = "1" ]; then
+  # Development: single auto-reloading worker (--reload can't be combined with --workers)
+  nohup uvicorn main:app --host 0.0.0.0 --port 8000 --reload > logs/server.log 2>&1 
+else
+  # uvloop + httptools, one worker per CPU, no per-request access log;
+  # --limit-concurrency bounds in-flight requests per worker so Motor's pool (maxPoolSize=50) isn't starved
+  nohup uvicorn main:app --host 0.0.0.0 --port 8000 \
+    --loop uvloop --http httptools \
+    --workers "${WEB_CONCURRENCY:-$(nproc)}" \
+    --limit-concurrency "${LIMIT_CONCURRENCY:-200}" \
+    --no-access-log > logs/server.log 2>&1 
+fi
 echo "Server started in background"
@@ -0,0 +1,56 @@
+"""
+Background Tasks
+
+Celery tasks for post-commit side effects that shouldn't hold up the HTTP
+response. Start a worker next to the API with:
+
+    celery -A tasks worker
+
+When BROKER_URL is not set the API applies these updates inline instead.
+"""
+
+from typing import List
+
+from bson import ObjectId
+from celery import Celery
+from pymongo import MongoClient, UpdateOne
+
+from config import settings
+
+broker_url = settings.broker_url
+
+celery_app = Celery("gaming", broker=broker_url or None)
+
+# Per-outcome $inc payloads applied atomically to team.stats
+WIN_STATS_INC = {"stats.matches": 1, "stats.wins": 1, "stats.points": 3}
+LOSS_STATS_INC = {"stats.matches": 1, "stats.losses": 1}
+DRAW_STATS_INC = {"stats.matches": 1, "stats.draws": 1, "stats.points": 1}
+
+_worker_db = None
+
+
+def stats_updates(winner_id: str, loser_id: str, draw: bool) -> List[UpdateOne]:
+    """Build the team stat updates for one match (simple Elo-like: win +3, loss 0, draw 1 each)"""
+    if draw:
+        return [
+            UpdateOne({"_id": ObjectId(winner_id)}, {"$inc": DRAW_STATS_INC}),
+            UpdateOne({"_id": ObjectId(loser_id)}, {"$inc": DRAW_STATS_INC}),
+        ]
+    return [
+        UpdateOne({"_id": ObjectId(winner_id)}, {"$inc": WIN_STATS_INC}),
+        UpdateOne({"_id": ObjectId(loser_id)}, {"$inc": LOSS_STATS_INC}),
+    ]
+
+
+def _get_worker_db():
+    # Workers are plain sync processes, so they get their own blocking client
+    global _worker_db
+    if _worker_db is None:
+        _worker_db = MongoClient(settings.database_url)[settings.database_name]
+    return _worker_db
+
+
+@celery_app.task
+def propagate_stats(winner_id: str, loser_id: str, draw: bool = False):
+    """Apply a recorded match to both teams' stats"""
+    _get_worker_db()["team"].bulk_write(stats_updates(winner_id, loser_id, draw), ordered=False)